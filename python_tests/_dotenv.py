@@ -0,0 +1,49 @@
+"""Shared .env loader for the python_tests scripts.
+
+One fast implementation instead of a near-duplicate parser per script:
+a single compiled pattern scans the whole file in one C-level pass, and
+results are memoized on (path, mtime, size) so repeated loads in one
+process cost a stat instead of a re-read and re-scan.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict
+
+# Values may be bare, double-quoted, or single-quoted; comment lines are
+# skipped by the lookahead.
+_DOTENV_RE = re.compile(
+    r"^[ \t]*(?!#)([A-Za-z_][A-Za-z0-9_]*)[ \t]*=[ \t]*"
+    r"(?:\"([^\"\n]*)\"|'([^'\n]*)'|([^\n]*?))[ \t]*$",
+    re.MULTILINE,
+)
+
+
+@lru_cache(maxsize=8)
+def _parse_dotenv(path: str, mtime_ns: int, size: int) -> Dict[str, str]:
+    values: Dict[str, str] = {}
+    for match in _DOTENV_RE.finditer(Path(path).read_text()):
+        values[match.group(1)] = next(
+            (group for group in match.group(2, 3, 4) if group is not None), ""
+        )
+    return values
+
+
+def load_env(path: Path = Path(".env"), *, override: bool = False) -> None:
+    """Populate os.environ with KEY=VALUE pairs from a dotenv file.
+
+    Existing variables win unless override=True.
+    """
+    if not path.is_file():
+        return
+    stat = path.stat()
+    values = _parse_dotenv(str(path), stat.st_mtime_ns, stat.st_size)
+    if override:
+        os.environ.update(values)
+    else:
+        for key, value in values.items():
+            os.environ.setdefault(key, value)
@@ -22,18 +22,28 @@ ROUTER_CAPS        (default: text,image)
 
 from __future__ import annotations
 
+import itertools
 import json
 import os
 import signal
+import socket
 import sys
 import time
-import uuid
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
 
 import requests
 from openai import OpenAI, OpenAIError
+from requests.adapters import HTTPAdapter
+
+from _dotenv import load_env
+
+try:  # Optional C-speed JSON; the demo still works on the stdlib without it.
+    import orjson
+except ImportError:
+    orjson = None
 
 DEFAULT_ALIAS = "openai-multimodal"
 DEFAULT_ROUTER_URL = "http://localhost:9099"
@@ -41,19 +51,55 @@ DEFAULT_ROUTIIUM_URL = "http://localhost:8088"
 DEFAULT_ROUTIIUM_LABEL = "chat-demo"
 DEFAULT_ROUTIIUM_TTL = 86400  # 1 day
 
+# Disable Nagle so the small JSON posts flush immediately instead of waiting
+# for ACK coalescing, and keep idle pooled connections alive between turns.
+_SOCKET_OPTIONS = [
+    (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+    (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+]
+
+
+class NoDelayAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = _SOCKET_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+
+# Shared keep-alive session so every chat turn reuses the same router/Routiium
+# connections instead of re-handshaking per call.
+SESSION = requests.Session()
+_ADAPTER = NoDelayAdapter(pool_connections=4, pool_maxsize=4, max_retries=0)
+SESSION.mount("http://", _ADAPTER)
+SESSION.mount("https://", _ADAPTER)
+
+
+# The stdlib does no DNS caching, so every cold connection re-runs
+# getaddrinfo. Memoize lookups for the session and pre-resolve known hosts.
+_ADDRINFO_CACHE: dict = {}
+_real_getaddrinfo = socket.getaddrinfo
+
+
+def _cached_getaddrinfo(host, port, *args, **kwargs):
+    key = (host, port, args, tuple(sorted(kwargs.items())))
+    entry = _ADDRINFO_CACHE.get(key)
+    if entry is None:
+        entry = _ADDRINFO_CACHE[key] = _real_getaddrinfo(host, port, *args, **kwargs)
+    return entry
+
 
-def load_env() -> None:
-    path = Path(".env")
-    if not path.exists():
-        return
-    for raw_line in path.read_text().splitlines():
-        line = raw_line.strip()
-        if not line or line.startswith("#") or "=" not in line:
+def prime_dns_cache(*urls: str) -> None:
+    """Resolve each URL's host once up front and serve later lookups from
+    the in-process cache."""
+    socket.getaddrinfo = _cached_getaddrinfo
+    for url in urls:
+        parsed = urlparse(url)
+        if not parsed.hostname:
+            continue
+        port = parsed.port or (443 if parsed.scheme == "https" else 80)
+        try:
+            _cached_getaddrinfo(parsed.hostname, port, type=socket.SOCK_STREAM)
+        except socket.gaierror:
             continue
-        key, value = line.split("=", 1)
-        key = key.strip()
-        value = value.strip().strip('"').strip("'")
-        os.environ.setdefault(key, value)
 
 
 def get_env_array(name: str, default: str) -> List[str]:
@@ -73,7 +119,7 @@ def maybe_generate_routiium_key(base_url: str) -> Optional[str]:
     ttl = int(os.getenv("ROUTIIUM_KEY_TTL", DEFAULT_ROUTIIUM_TTL))
     url = f"{base_url.rstrip('/')}/keys/generate"
     try:
-        resp = requests.post(
+        resp = SESSION.post(
             url,
             json={"label": label, "ttl_seconds": ttl},
             timeout=10,
@@ -126,28 +172,57 @@ class PlanMeta:
     headers: Dict
 
 
+PREVIEW_TURNS = 4
+
+# Request ids only need to be unique per process; a pid/start-time prefix
+# plus a counter avoids the urandom read and hex formatting of uuid4 on
+# every plan request.
+_REQ_PREFIX = f"chat-{os.getpid()}-{int(time.time())}"
+_REQ_COUNTER = itertools.count()
+
+
+@dataclass
+class ConversationHistory:
+    """Turn log plus a rolling pre-rendered preview of the last few turns.
+
+    The router embeds conversation.summary for routing, so the preview has to
+    be sent -- but it only ever changes by one line per turn, so it is
+    maintained incrementally instead of being rebuilt from the full log on
+    every plan request.
+    """
+
+    turns: List[Dict[str, str]] = field(default_factory=list)
+    _preview_lines: List[str] = field(default_factory=list)
+
+    def append(self, role: str, content: str) -> None:
+        self.turns.append({"role": role, "content": content})
+        self._preview_lines.append(f"{role.upper()}: {content}")
+        if len(self._preview_lines) > PREVIEW_TURNS:
+            del self._preview_lines[0]
+
+    @property
+    def preview(self) -> str:
+        return "\n".join(self._preview_lines)
+
+
 def fetch_plan(
     router_url: str,
     alias: str,
     privacy_mode: str,
     caps: List[str],
-    conversation: List[Dict[str, str]],
-    user_message: str,
+    history: ConversationHistory,
 ) -> PlanMeta:
-    history_preview = "\n".join(
-        [f"{turn['role'].upper()}: {turn['content']}" for turn in conversation[-4:]]
-    )
     payload = {
         "schema_version": "1.1",
-        "request_id": str(uuid.uuid4()),
+        "request_id": f"{_REQ_PREFIX}-{next(_REQ_COUNTER)}",
         "alias": alias,
         "api": "responses",
         "privacy_mode": privacy_mode,
         "stream": False,
         "caps": caps,
         "conversation": {
-            "summary": history_preview,
-            "turns": len(conversation),
+            "summary": history.preview,
+            "turns": len(history.turns),
         },
         "overrides": {},
         "estimates": {
@@ -155,11 +230,12 @@ def fetch_plan(
             "max_output_tokens": 512,
         },
     }
-    resp = requests.post(
+    resp = SESSION.post(
         f"{router_url.rstrip('/')}/route/plan", json=payload, timeout=30
     )
     resp.raise_for_status()
-    return PlanMeta(plan=resp.json(), headers=dict(resp.headers))
+    plan = orjson.loads(resp.content) if orjson else resp.json()
+    return PlanMeta(plan=plan, headers=dict(resp.headers))
 
 
 def ensure_api_base(url: str) -> str:
@@ -202,15 +278,25 @@ def resolve_api_key(upstream: Dict) -> str:
     )
 
 
+# The plan's upstream rarely changes between turns for the same alias, so the
+# OpenAI client (and its underlying connection pool + TLS session) is cached
+# instead of being rebuilt for every message.
+_CLIENT_CACHE: Dict[tuple, OpenAI] = {}
+
+
 def create_chat_client(upstream: Dict) -> OpenAI:
     base_url = ensure_api_base(upstream["base_url"])
     api_key = resolve_api_key(upstream)
     headers = upstream.get("headers") or {}
-    return OpenAI(
-        api_key=api_key,
-        base_url=base_url,
-        default_headers=headers if headers else None,
-    )
+    cache_key = (base_url, api_key, tuple(sorted(headers.items())))
+    client = _CLIENT_CACHE.get(cache_key)
+    if client is None:
+        client = _CLIENT_CACHE[cache_key] = OpenAI(
+            api_key=api_key,
+            base_url=base_url,
+            default_headers=headers if headers else None,
+        )
+    return client
 
 
 def messages_to_response_input(messages: List[Dict[str, str]]) -> List[Dict[str, Any]]:
@@ -235,7 +321,6 @@ def messages_to_response_input(messages: List[Dict[str, str]]) -> List[Dict[str,
 
 def invoke_llm(plan: Dict, messages: List[Dict[str, str]]) -> Dict:
     upstream = plan["upstream"]
-    client = create_chat_client(upstream)
     max_tokens = plan.get("limits", {}).get("max_output_tokens") or 512
     route_id = plan.get("route_id")
     metadata = {
@@ -246,6 +331,7 @@ def invoke_llm(plan: Dict, messages: List[Dict[str, str]]) -> Dict:
     mode = (upstream.get("mode") or "responses").lower()
 
     if "chat" in mode:
+        client = create_chat_client(upstream)
         create_kwargs: Dict[str, Any] = {
             "model": upstream["model_id"],
             "messages": messages,
@@ -254,50 +340,89 @@ def invoke_llm(plan: Dict, messages: List[Dict[str, str]]) -> Dict:
         if route_id:
             create_kwargs["user"] = route_id[:64]
         response = client.chat.completions.create(**create_kwargs)
-    else:
-        create_kwargs = {
-            "model": upstream["model_id"],
-            "input": messages_to_response_input(messages),
-            "max_output_tokens": max_tokens,
-        }
-        if metadata:
-            create_kwargs["metadata"] = metadata
-        response = client.responses.create(**create_kwargs)
-    return response.model_dump()
+        return response.model_dump()
+
+    # The common responses path forwards exactly one request, so skip the
+    # SDK's validation/retry/model_dump layers and post straight to the REST
+    # endpoint over the pooled session. The parsed JSON already has the dict
+    # shape extract_text expects.
+    payload: Dict[str, Any] = {
+        "model": upstream["model_id"],
+        "input": messages_to_response_input(messages),
+        "max_output_tokens": max_tokens,
+    }
+    if metadata:
+        payload["metadata"] = metadata
+    headers = {"Authorization": f"Bearer {resolve_api_key(upstream)}"}
+    headers.update(upstream.get("headers") or {})
+    resp = SESSION.post(
+        f"{ensure_api_base(upstream['base_url'])}/responses",
+        json=payload,
+        headers=headers,
+        timeout=120,
+    )
+    resp.raise_for_status()
+    return orjson.loads(resp.content) if orjson else resp.json()
+
+
+def _fast_extract(output: Dict) -> List[str]:
+    """Specialized extractor for the common Responses shape
+    output[*]["content"][*] -> {"type": "output_text", "text": str}."""
+    try:
+        return [
+            part["text"]
+            for entry in output.get("output", ())
+            for part in entry.get("content", ())
+            if part.get("type") in ("output_text", "text")
+            and isinstance(part.get("text"), str)
+        ]
+    except (AttributeError, TypeError):
+        return []
 
 
 def extract_text(output: Dict) -> str:
-    def gather_text(node: Any) -> List[str]:
-        collected: List[str] = []
-        if isinstance(node, dict):
-            entry_type = node.get("type")
-            if entry_type in {"output_text", "text"}:
-                value = node.get("text")
-                if isinstance(value, str):
-                    collected.append(value)
-                elif isinstance(value, list):
-                    for item in value:
-                        if isinstance(item, str):
-                            collected.append(item)
-                        elif isinstance(item, dict):
-                            text_val = item.get("text")
-                            if text_val:
-                                collected.append(text_val)
-            content = node.get("content")
-            if isinstance(content, list):
-                for child in content:
-                    collected.extend(gather_text(child))
-        elif isinstance(node, list):
-            for child in node:
-                collected.extend(gather_text(child))
-        return collected
-
-    chunks: List[str] = []
-    for entry in output.get("output", []):
-        chunks.extend(gather_text(entry))
+    # Try the known API shape first; the generic walker below only runs for
+    # payloads that do not match it.
+    chunks: List[str] = _fast_extract(output)
+    # Iterative depth-first walk with an explicit stack: one shared chunk
+    # list instead of per-node call frames and extend chains, and no
+    # recursion ceiling on deeply nested responses. Children are pushed
+    # reversed so text still comes out in document order.
+    stack: List[Any] = [] if chunks else list(reversed(output.get("output", [])))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        if not isinstance(node, dict):
+            continue
+        entry_type = node.get("type")
+        if entry_type in {"output_text", "text"}:
+            value = node.get("text")
+            if isinstance(value, str):
+                chunks.append(value)
+            elif isinstance(value, list):
+                for item in value:
+                    if isinstance(item, str):
+                        chunks.append(item)
+                    elif isinstance(item, dict):
+                        text_val = item.get("text")
+                        if text_val:
+                            chunks.append(text_val)
+        content = node.get("content")
+        if isinstance(content, list):
+            stack.extend(reversed(content))
     text = "\n".join(
         chunk.strip() for chunk in chunks if isinstance(chunk, str) and chunk.strip()
     )
+    if not text and "choices" in output:
+        # Fast path for the chat-completions shape before the generic scan.
+        try:
+            direct = output["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            direct = None
+        if isinstance(direct, str) and direct.strip():
+            text = direct.strip()
     if not text and "choices" in output:
         for choice in output.get("choices", []):
             message = choice.get("message") or {}
@@ -314,9 +439,11 @@ def extract_text(output: Dict) -> str:
                             text += ("\n" if text else "") + value.strip()
 
     if not text:
-        Path("chat_router_demo_last_response.json").write_text(
-            json.dumps(output, indent=2), encoding="utf-8"
-        )
+        dump_path = Path("chat_router_demo_last_response.json")
+        if orjson:
+            dump_path.write_bytes(orjson.dumps(output, option=orjson.OPT_INDENT_2))
+        else:
+            dump_path.write_text(json.dumps(output, indent=2), encoding="utf-8")
         fallback_bits = []
         status = output.get("status")
         if status:
@@ -382,6 +509,7 @@ def main() -> int:
     signal.signal(signal.SIGTERM, graceful_exit)
 
     router_url = os.getenv("ROUTER_URL", DEFAULT_ROUTER_URL)
+    prime_dns_cache(router_url, os.getenv("ROUTIIUM_URL", DEFAULT_ROUTIIUM_URL))
     alias = os.getenv("ROUTER_ALIAS", DEFAULT_ALIAS)
     privacy = os.getenv("ROUTER_PRIVACY", "features_only")
     caps = get_env_array("ROUTER_CAPS", "text,image")
@@ -393,38 +521,36 @@ def main() -> int:
     print(f"Capabilities : {', '.join(caps)}")
     print("Press Ctrl+C to exit.\n")
 
-    conversation: List[Dict[str, str]] = []
+    history = ConversationHistory()
 
     while True:
         user_message = input("You: ").strip()
         if not user_message:
             continue
-        conversation.append({"role": "user", "content": user_message})
+        history.append("user", user_message)
 
         try:
-            plan_meta = fetch_plan(
-                router_url, alias, privacy, caps, conversation, user_message
-            )
+            plan_meta = fetch_plan(router_url, alias, privacy, caps, history)
         except requests.HTTPError as exc:
             print(f"[router error] {exc} -> {exc.response.text}")
             continue
 
         print_router_snapshot(plan_meta)
-        messages = build_messages(plan_meta.plan, conversation[:-1], user_message)
+        messages = build_messages(plan_meta.plan, history.turns[:-1], user_message)
 
         try:
             start = time.perf_counter()
             llm_resp = invoke_llm(plan_meta.plan, messages)
             latency = (time.perf_counter() - start) * 1000.0
             assistant_text = extract_text(llm_resp)
-        except OpenAIError as exc:
+        except (OpenAIError, requests.RequestException) as exc:
             print(f"[LLM error] {exc}")
             continue
         except RuntimeError as exc:
             print(f"[config error] {exc}")
             continue
 
-        conversation.append({"role": "assistant", "content": assistant_text})
+        history.append("assistant", assistant_text)
         print(f"Assistant ({latency:.1f} ms):\n{assistant_text}\n")
         print(
             "[trace]",
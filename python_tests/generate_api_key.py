@@ -13,27 +13,41 @@ import json
 import os
 import sys
 from datetime import datetime, timezone
-from pathlib import Path
-from typing import Any, Dict, List, Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
-import requests
+from _dotenv import load_env
 
+try:  # Optional C-speed JSON; HTTP bodies fall back to the stdlib without it.
+    import orjson
+except ImportError:
+    orjson = None
 
-def load_env_file(path: Path = Path(".env")) -> None:
-    """Populate os.environ with KEY=VALUE pairs from .env if not already set."""
-    if not path.is_file():
-        return
+if TYPE_CHECKING:
+    import requests
 
-    for raw_line in path.read_text().splitlines():
-        line = raw_line.strip()
-        if not line or line.startswith("#") or "=" not in line:
-            continue
-        key, value = line.split("=", 1)
-        key = key.strip()
-        if not key or key in os.environ:
-            continue
-        cleaned = value.strip().strip('"').strip("'")
-        os.environ[key] = cleaned
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+# requests (and the pooled session built on it) is imported lazily so that
+# --help and argument errors return without paying the SDK import cost.
+@lru_cache(maxsize=1)
+def _get_session() -> "requests.Session":
+    """Pooled session, built once on first use: one-shot CLI runs behave the
+    same, but callers invoking main() in a loop reuse the warm TCP/TLS
+    connection across keys."""
+    import requests
+    from requests.adapters import HTTPAdapter, Retry
+
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=4,
+        max_retries=Retry(total=2, backoff_factor=0.2),
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
 
 def parse_expires_at(value: Optional[str]) -> Optional[int]:
@@ -47,7 +61,13 @@ def parse_expires_at(value: Optional[str]) -> Optional[int]:
     if stripped.isdigit():
         return int(stripped, 10)
 
-    normalized = stripped.upper().replace("Z", "+00:00")
+    # Only the trailing Z needs rewriting for fromisoformat (which is C code
+    # and handles the rest); slicing it off beats upper-casing and replacing
+    # across the whole string.
+    if stripped.endswith(("Z", "z")):
+        normalized = stripped[:-1] + "+00:00"
+    else:
+        normalized = stripped
     try:
         dt = datetime.fromisoformat(normalized)
     except ValueError as exc:
@@ -90,14 +110,19 @@ def build_payload(
     return payload
 
 
+@lru_cache(maxsize=1024)
+def _iso_utc(ts: int) -> str:
+    """ISO-8601 UTC string for a unix timestamp, memoized: keys sharing a
+    TTL repeat the same expiry, so re-renderings become dict lookups."""
+    return datetime.fromtimestamp(ts, tz=timezone.utc).isoformat()
+
+
 def print_human_readable(data: Dict[str, Any]) -> None:
     token = data.get("token", "")
     expires_at = data.get("expires_at")
     expires_str = "never"
     if isinstance(expires_at, (int, float)):
-        expires_str = datetime.fromtimestamp(
-            int(expires_at), tz=timezone.utc
-        ).isoformat()
+        expires_str = _iso_utc(int(expires_at))
 
     scopes = data.get("scopes") or []
     scopes_text = ", ".join(scopes) if scopes else "default"
@@ -115,27 +140,24 @@ def print_human_readable(data: Dict[str, Any]) -> None:
         print("\nStore this token securely; Routiium cannot show it again.")
 
 
-def main(argv: Optional[List[str]] = None) -> int:
-    load_env_file()
-
+def _make_parser() -> argparse.ArgumentParser:
+    # Env-dependent defaults stay as None sentinels so the parser can be
+    # built once at import; main() resolves them after load_env runs.
     parser = argparse.ArgumentParser(
         description="Generate a Routiium managed API key via /keys/generate."
     )
     parser.add_argument(
         "--base-url",
-        default=os.getenv("ROUTIIUM_BASE", "http://127.0.0.1:8088"),
-        help="Routiium base URL (no trailing slash).",
+        help="Routiium base URL, no trailing slash (default: $ROUTIIUM_BASE or http://127.0.0.1:8088).",
     )
     parser.add_argument(
         "--label",
-        default=os.getenv("ROUTIIUM_KEY_LABEL", "keygen"),
-        help="Label to associate with the generated key.",
+        help="Label to associate with the generated key (default: $ROUTIIUM_KEY_LABEL or 'keygen').",
     )
     parser.add_argument(
         "--ttl-seconds",
         type=int,
-        default=env_int("ROUTIIUM_KEY_TTL"),
-        help="TTL in seconds (optional if expires-at is provided).",
+        help="TTL in seconds, optional if expires-at is provided (default: $ROUTIIUM_KEY_TTL).",
     )
     parser.add_argument(
         "--expires-at",
@@ -158,36 +180,70 @@ def main(argv: Optional[List[str]] = None) -> int:
         action="store_true",
         help="Print the raw JSON response instead of friendly text.",
     )
+    return parser
 
-    args = parser.parse_args(argv)
 
-    ttl_seconds = args.ttl_seconds
+# Built once at import so repeated main() calls (e.g. parametrized tests)
+# skip the per-call parser construction.
+_PARSER = _make_parser()
+
+
+def main(
+    argv: Optional[List[str]] = None,
+    session: Optional[requests.Session] = None,
+) -> int:
+    load_env()
+    args = _PARSER.parse_args(argv)
+
+    ttl_seconds = (
+        args.ttl_seconds
+        if args.ttl_seconds is not None
+        else env_int("ROUTIIUM_KEY_TTL")
+    )
     if ttl_seconds is not None and ttl_seconds <= 0:
-        parser.error("--ttl-seconds must be a positive integer.")
+        _PARSER.error("--ttl-seconds must be a positive integer.")
 
     expires_at: Optional[int] = None
     if args.expires_at:
         try:
             expires_at = parse_expires_at(args.expires_at)
         except argparse.ArgumentTypeError as exc:
-            parser.error(str(exc))
+            _PARSER.error(str(exc))
 
-    base_url = args.base_url.rstrip("/")
-    payload = build_payload(args.label, ttl_seconds, expires_at, args.scopes)
+    base_url = (
+        args.base_url or os.getenv("ROUTIIUM_BASE", "http://127.0.0.1:8088")
+    ).rstrip("/")
+    label = args.label or os.getenv("ROUTIIUM_KEY_LABEL", "keygen")
+    payload = build_payload(label, ttl_seconds, expires_at, args.scopes)
 
+    import requests
+
+    http = session or _get_session()
     try:
-        response = requests.post(
-            f"{base_url}/keys/generate",
-            json=payload,
-            timeout=args.timeout,
-        )
+        if orjson is not None:
+            # Pre-encoded body via data= skips the stdlib json serializer
+            # inside requests; decode likewise reads the raw bytes once.
+            response = http.post(
+                f"{base_url}/keys/generate",
+                data=orjson.dumps(payload),
+                headers=_JSON_HEADERS,
+                timeout=args.timeout,
+            )
+        else:
+            response = http.post(
+                f"{base_url}/keys/generate",
+                json=payload,
+                timeout=args.timeout,
+            )
         response.raise_for_status()
     except requests.RequestException as exc:
         print(f"✗ Failed to call /keys/generate: {exc}", file=sys.stderr)
         return 1
 
     try:
-        data = response.json()
+        data = (
+            orjson.loads(response.content) if orjson is not None else response.json()
+        )
     except ValueError as exc:
         print(f"✗ Routiium returned non-JSON body: {exc}", file=sys.stderr)
         return 1
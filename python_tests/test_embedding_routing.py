@@ -4,17 +4,52 @@
 from __future__ import annotations
 
 import argparse
+import secrets
 import sys
-import uuid
-from typing import Optional
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
 
-import requests
+try:  # Optional C-speed JSON; HTTP bodies fall back to the stdlib without it.
+    import orjson
+except ImportError:
+    orjson = None
 
+if TYPE_CHECKING:
+    import requests
 
-def run_check(router_url: str, alias: str, summary: str, expected_model: str) -> None:
+_JSON_HEADERS = {"Content-Type": "application/json"}
+
+
+# requests is imported lazily so --help and argument errors return before
+# the SDK import cost is paid.
+@lru_cache(maxsize=1)
+def _get_session() -> "requests.Session":
+    """Pooled session, built once on first use: a single check behaves the
+    same, but callers looping over several summaries reuse the warm TCP
+    connection instead of reconnecting."""
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def run_check(
+    router_url: str,
+    alias: str,
+    summary: str,
+    expected_model: str,
+    session: Optional[requests.Session] = None,
+) -> None:
+    http = session or _get_session()
     payload = {
         "schema_version": "1.1",
-        "request_id": f"embed-check-{uuid.uuid4().hex[:12]}",
+        # token_hex(6) gives the same 12 hex chars without building and
+        # slicing a UUID object per request.
+        "request_id": f"embed-check-{secrets.token_hex(6)}",
         "alias": alias,
         "api": "responses",
         "privacy_mode": "features_only",
@@ -22,13 +57,21 @@ def run_check(router_url: str, alias: str, summary: str, expected_model: str) ->
         "stream": False,
         "conversation": {"summary": summary},
     }
-    resp = requests.post(f"{router_url.rstrip('/')}/route/plan", json=payload, timeout=15)
+    plan_url = f"{router_url.rstrip('/')}/route/plan"
+    if orjson is not None:
+        # The summary string can be large; orjson encodes it at C speed and
+        # data= hands requests the finished bytes instead of re-serializing.
+        resp = http.post(
+            plan_url, data=orjson.dumps(payload), headers=_JSON_HEADERS, timeout=15
+        )
+    else:
+        resp = http.post(plan_url, json=payload, timeout=15)
     if resp.status_code != 200:
         raise SystemExit(
             f"/route/plan failed: {resp.status_code} {resp.text.strip()}"
         )
     canonical_header = resp.headers.get("X-Canonical-Model")
-    data = resp.json()
+    data = orjson.loads(resp.content) if orjson is not None else resp.json()
     canonical_body: Optional[str] = data.get("canonical", {}).get("model")
     resolved = data.get("upstream", {}).get("model_id")
 